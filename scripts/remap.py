@@ -39,7 +39,8 @@ from phas.dltrain import spatial_transform_roi
 
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 from src.histology_data import HistologyData
-from src.remap_roi import RemapROI, process_roi_data
+from src.remap_roi import RemapROI
+from src.roi_set import ROISet, scale_roi_data
 
 
 def connect_to_server(task_id, phas_url, private_key):
@@ -50,6 +51,49 @@ def connect_to_server(task_id, phas_url, private_key):
     return task
 
 
+def remap_sampling_rois(task, fixed_slide_id, moving_slide_id, fixed_scale, moving_scale, fn_transform):
+    """
+    Remap all sampling ROIs of the fixed slide onto the moving slide.
+
+    All ROIs are parsed and scaled to the fixed thumbnail space in one go.
+    Existing ROIs on the moving slide are deleted only after that succeeds,
+    then each ROI is warped, scaled to full resolution and created in turn,
+    so a failing ROI keeps the ones already created.
+
+    Args:
+        task: PHAS SamplingROITask
+        fixed_slide_id: Slide ID of the fixed slide (with the sampling ROI)
+        moving_slide_id: Slide ID of the moving slide
+        fixed_scale (float): Full resolution -> thumbnail scaling factor of the fixed slide
+        moving_scale (float): Full resolution -> thumbnail scaling factor of the moving slide
+        fn_transform: Maps (x, y) in the fixed thumbnail to the moving thumbnail
+    """
+    # Get the sampling ROI coordinates
+    fixed_rois = list(task.slide_sampling_rois(fixed_slide_id))
+    # If type is polygon, the data [[x1, y1], [x2, y2], ...]
+    # If type is trapezoid, the data [[x1, y1, w1], [x2, y2, w2], ...]
+    roi_jsons = [json.loads(roi['json']) for roi in fixed_rois]
+
+    # Get the ROI coordinates of all ROIs in the thumbnail space in one go
+    rois_thumbnail = ROISet.from_json(roi_jsons).scaled(fixed_scale)
+
+    # Reset the sampling ROI on the moving slide
+    task.delete_sampling_rois_on_slide(moving_slide_id)
+
+    for i, (roi, roi_json) in enumerate(zip(fixed_rois, roi_jsons)):
+        print(f"Processing ROI {roi['id']}")
+
+        # Apply the remapping to the ROI
+        roi_warped = spatial_transform_roi(rois_thumbnail.to_json(i), fn_transform)
+
+        # Get the ROI coordinates in the full resolution space for the tau slide
+        # and create the json for the tau slide, keeping any other fields of the original ROI
+        roi_json['data'] = scale_roi_data(roi_json['type'], roi_warped['data'], 1/moving_scale)
+        task.create_sampling_roi(moving_slide_id, roi['label'], roi_json)
+
+        print(f"Created ROI {roi['id']} on the moving slide")
+
+
 if __name__ == '__main__':
     parse = argparse.ArgumentParser(description="Map PHAS sampling ROI from one stain to another")
     parse.add_argument('--phas_url', type=str, help='PHAS server URL')
@@ -73,32 +117,6 @@ if __name__ == '__main__':
     # Create the Remap object
     remap = RemapROI(registration_dir, moving_slide)
 
-    # Reset the sampling ROI on the moving slide
-    task.delete_sampling_rois_on_slide(moving_slide_id)
-
-    # Get the sampling ROI coordinates
-    for roi in task.slide_sampling_rois(fixed_slide_id):
-        print(f"Processing ROI {roi['id']}")
-
-        roi_json = json.loads(roi['json'])
-        roi_type = roi_json['type'] # polygon or trapezoid
-        # If type is polygon, the data [[x1, y1], [x2, y2], ...]
-        # If type is trapezoid, the data [[x1, y1, w1], [x2, y2, w2], ...]
-        roi_data = roi_json['data'] # list of listsroi_data = roi_json['data'] # list of lists
-
-        # Get the ROI coordinates in the thumbnail space
-        roi_thumbnail_json = roi_json.copy()
-        roi_thumbnail_json['data'] = process_roi_data(roi_data, roi_type, fixed_slide.scaling_factor)
-
-        # Apply the remapping to the ROI
-        roi_warped = spatial_transform_roi(roi_thumbnail_json, remap.registration_transform)
-
-        # Get the ROI coordinates in the full resolution space for the tau slide
-        roi_fullres_warped = process_roi_data(roi_warped['data'], roi_type, 1/moving_slide.scaling_factor)
-
-        # Create the json for the tau slide
-        roi_warped = roi_json.copy()
-        roi_warped['data'] = roi_fullres_warped
-        roi_moving = task.create_sampling_roi(moving_slide_id, roi['label'], roi_warped)
-
-        print(f"Created ROI on the moving slide")
+    remap_sampling_rois(task, fixed_slide_id, moving_slide_id,
+                        fixed_slide.scaling_factor, moving_slide.scaling_factor,
+                        remap.registration_transform)
@@ -0,0 +1,186 @@
+import numpy as np
+
+
+# Type tags stored in ROISet.rois['type']
+ROI_TYPES = ('polygon', 'trapezoid')
+ROI_TYPE_TAGS = {roi_type: tag for tag, roi_type in enumerate(ROI_TYPES)}
+
+# Number of values per vertex in the PHAS json for each ROI type
+# polygon:   [x, y]
+# trapezoid: [x, y, w]
+ROI_TYPE_COLUMNS = {'polygon': 2, 'trapezoid': 3}
+
+ROI_DTYPE = np.dtype([('type', np.uint8), ('start', np.int64), ('stop', np.int64)])
+VERTEX_DTYPE = np.dtype([('x', np.float64), ('y', np.float64), ('w', np.float64)])
+
+# Integer coordinates are in the center of the voxel, hence the +0.5
+# adjustment for x and y. Trapezoid widths are only scaled.
+VOXEL_CENTER_OFFSET = np.array([0.5, 0.5, 0.0])
+
+
+def _data_block(roi_type, data):
+    # Convert the PHAS data of a single ROI to an (n, n_cols) float array
+    n_cols = ROI_TYPE_COLUMNS[roi_type]
+    message = f"{roi_type} ROI data must be a non-empty list of {n_cols}-element coordinates"
+    try:
+        block = np.asarray(data, dtype=np.float64)
+    except (TypeError, ValueError):
+        # Ragged or non-numeric data
+        raise ValueError(message) from None
+
+    if block.ndim != 2 or block.shape[0] == 0 or block.shape[1] != n_cols:
+        raise ValueError(message)
+
+    return block
+
+
+def _columns(vertices):
+    # All vertex fields are float64, so the structured array can be viewed as
+    # an (n, 3) float array; per-ROI slicing and writing on this view avoids
+    # per-field work for every ROI
+    return vertices.view(np.float64).reshape(-1, len(VERTEX_DTYPE.names))
+
+
+def _scale_block(block, scale):
+    # Scale an (n, 2) or (n, 3) float block of [x, y(, w)] coordinates
+    scaled = block + VOXEL_CENTER_OFFSET[:block.shape[1]]
+    scaled *= scale
+
+    return scaled
+
+
+def scale_roi_data(roi_type, data, scale):
+    """
+    Convert the PHAS data of a single ROI between full resolution and thumbnail space.
+
+    Uses the same scaling as ROISet.scaled(), for coordinates that come back
+    one ROI at a time (e.g. from spatial_transform_roi).
+
+    Args:
+        roi_type (str): ROI type - 'polygon' or 'trapezoid'
+        data (list): List of [x, y] or [x, y, w] coordinates
+        scale (float): Scaling factor
+
+    Returns:
+        list: Scaled coordinates in PHAS format
+    """
+    if roi_type not in ROI_TYPE_TAGS:
+        raise ValueError(f"Unknown ROI type: {roi_type}")
+
+    return _scale_block(_data_block(roi_type, data), scale).tolist()
+
+
+class ROISet:
+    """
+    Compact container for many PHAS sampling ROIs.
+
+    All vertices of all ROIs are stored in a single structured array and each
+    ROI is a (type, start, stop) record pointing into it. This lets us scale
+    whole slides' worth of ROIs between full resolution and thumbnail space
+    in one vectorized operation, and only convert to and from the PHAS json
+    list of lists at the I/O boundary.
+
+    Attributes:
+        rois (np.ndarray): Structured array with ROI_DTYPE, one record per ROI
+        vertices (np.ndarray): Structured array with VERTEX_DTYPE, all vertices
+            of all ROIs. 'w' is unused (zero) for polygon vertices; a fixed
+            record keeps scaling a single vectorized pass over mixed ROI types.
+
+    Examples:
+        rois = ROISet.from_json([json.loads(roi['json']) for roi in task.slide_sampling_rois(slide_id)])
+        rois_thumbnail = rois.scaled(0.1)
+        roi_json = rois_thumbnail.to_json(0)
+    """
+
+    def __init__(self, rois, vertices):
+        self.rois = rois
+        self.vertices = vertices
+        self._columns = _columns(vertices)
+
+
+    def __len__(self):
+        return len(self.rois)
+
+
+    @classmethod
+    def from_json(cls, roi_jsons):
+        """
+        Build an ROISet from PHAS ROI json dicts.
+
+        Args:
+            roi_jsons (iterable): Dicts with 'type' ('polygon' or 'trapezoid')
+                and 'data' (list of [x, y] or [x, y, w] lists)
+
+        Returns:
+            ROISet: Container holding all ROIs in order
+        """
+        types = []
+        blocks = []
+        for roi_json in roi_jsons:
+            roi_type = roi_json['type']
+            if roi_type not in ROI_TYPE_TAGS:
+                raise ValueError(f"Unknown ROI type: {roi_type}")
+
+            types.append(ROI_TYPE_TAGS[roi_type])
+            blocks.append(_data_block(roi_type, roi_json['data']))
+
+        lengths = np.array([len(block) for block in blocks], dtype=np.int64)
+        offsets = np.zeros(len(blocks) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        rois = np.empty(len(blocks), dtype=ROI_DTYPE)
+        rois['type'] = types
+        rois['start'] = offsets[:-1]
+        rois['stop'] = offsets[1:]
+
+        vertices = np.zeros(offsets[-1], dtype=VERTEX_DTYPE)
+        columns = _columns(vertices)
+        for block, start, stop in zip(blocks, offsets[:-1], offsets[1:]):
+            columns[start:stop, :block.shape[1]] = block
+
+        return cls(rois, vertices)
+
+
+    def scaled(self, scale):
+        """
+        Convert all ROI coordinates between full resolution and thumbnail space.
+
+        Args:
+            scale (float): Scaling factor, e.g. slide.scaling_factor for
+                full -> thumbnail or 1/slide.scaling_factor for thumbnail -> full
+
+        Returns:
+            ROISet: New container with scaled vertices (ROI records are shared)
+        """
+        vertices = _scale_block(self._columns, scale)
+
+        return ROISet(self.rois, vertices.view(VERTEX_DTYPE).reshape(-1))
+
+
+    def roi_type(self, i):
+        """
+        Return the type ('polygon' or 'trapezoid') of ROI i.
+        """
+        return ROI_TYPES[self.rois['type'][i]]
+
+
+    def to_data(self, i, scale=None):
+        """
+        Return the vertices of ROI i as the PHAS list of lists.
+
+        If scale is given, the vertices are scaled as in scaled() on the way out.
+        """
+        roi = self.rois[i]
+        n_cols = ROI_TYPE_COLUMNS[ROI_TYPES[roi['type']]]
+        data = self._columns[roi['start']:roi['stop'], :n_cols]
+        if scale is not None:
+            data = _scale_block(data, scale)
+
+        return data.tolist()
+
+
+    def to_json(self, i):
+        """
+        Return ROI i as a PHAS json dict with 'type' and 'data'.
+        """
+        return {'type': self.roi_type(i), 'data': self.to_data(i)}
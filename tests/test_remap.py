@@ -0,0 +1,105 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip("SimpleITK")
+pytest.importorskip("phas")
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "scripts"))
+import remap
+from src.remap_roi import process_roi_data
+
+
+FIXED_SCALE = 0.02
+MOVING_SCALE = 0.025
+
+ROI_JSONS = [
+    {'type': 'polygon', 'data': [[1000, 2000], [3000, 4000], [5000, 1000]], 'color': 'red'},
+    {'type': 'trapezoid', 'data': [[1000, 2000, 300], [4000, 5000, 600]]},
+]
+
+
+class StubTask:
+
+    def __init__(self, roi_jsons):
+        self.rois = [{'id': i, 'label': 7, 'json': json.dumps(roi_json)} for i, roi_json in enumerate(roi_jsons)]
+        self.calls = []
+
+
+    def slide_sampling_rois(self, slide_id):
+        return self.rois
+
+
+    def delete_sampling_rois_on_slide(self, slide_id):
+        self.calls.append(('delete', slide_id))
+
+
+    def create_sampling_roi(self, slide_id, label, roi_json):
+        self.calls.append(('create', slide_id, label, json.loads(json.dumps(roi_json))))
+
+
+def stub_spatial_transform_roi(geom_data, fn_transform):
+    # Move x, y of every vertex with fn_transform and keep the trapezoid widths
+    geom_data['data'] = [[*fn_transform(v[:2]), *v[2:]] for v in geom_data['data']]
+    return geom_data
+
+
+def shift(xy):
+    return xy[0] + 3.0, xy[1] - 2.0
+
+
+def baseline_remap(roi_json):
+    # The per-ROI flow of scripts/remap.py before ROISet
+    roi_thumbnail_json = roi_json.copy()
+    roi_thumbnail_json['data'] = process_roi_data(roi_json['data'], roi_json['type'], FIXED_SCALE)
+    roi_warped = stub_spatial_transform_roi(roi_thumbnail_json, shift)
+    roi_fullres_warped = process_roi_data(roi_warped['data'], roi_json['type'], 1/MOVING_SCALE)
+
+    roi_moving = roi_json.copy()
+    roi_moving['data'] = roi_fullres_warped
+    return json.loads(json.dumps(roi_moving, default=float))
+
+
+def test_remap_sampling_rois_matches_baseline(monkeypatch):
+    monkeypatch.setattr(remap, 'spatial_transform_roi', stub_spatial_transform_roi)
+    task = StubTask(ROI_JSONS)
+
+    remap.remap_sampling_rois(task, 'fixed', 'moving', FIXED_SCALE, MOVING_SCALE, shift)
+
+    assert task.calls[0] == ('delete', 'moving')
+    created = task.calls[1:]
+    assert len(created) == len(ROI_JSONS)
+    for (call, slide_id, label, roi_json), expected in zip(created, map(baseline_remap, ROI_JSONS)):
+        assert (call, slide_id, label) == ('create', 'moving', 7)
+        assert roi_json.keys() == expected.keys()
+        assert roi_json['type'] == expected['type']
+        np.testing.assert_allclose(roi_json['data'], expected['data'])
+
+
+def test_remap_sampling_rois_parses_before_delete(monkeypatch):
+    monkeypatch.setattr(remap, 'spatial_transform_roi', stub_spatial_transform_roi)
+    task = StubTask(ROI_JSONS + [{'type': 'polygon', 'data': [[1, 2], [3]]}])
+
+    with pytest.raises(ValueError):
+        remap.remap_sampling_rois(task, 'fixed', 'moving', FIXED_SCALE, MOVING_SCALE, shift)
+
+    assert task.calls == []
+
+
+def test_remap_sampling_rois_keeps_created_on_failure(monkeypatch):
+    def failing_spatial_transform_roi(geom_data, fn_transform):
+        if geom_data['type'] == 'trapezoid':
+            raise IndexError("index out of bounds")
+        return stub_spatial_transform_roi(geom_data, fn_transform)
+
+    monkeypatch.setattr(remap, 'spatial_transform_roi', failing_spatial_transform_roi)
+    task = StubTask(ROI_JSONS)
+
+    with pytest.raises(IndexError):
+        remap.remap_sampling_rois(task, 'fixed', 'moving', FIXED_SCALE, MOVING_SCALE, shift)
+
+    assert [call[0] for call in task.calls] == ['delete', 'create']
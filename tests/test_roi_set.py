@@ -0,0 +1,77 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from src.roi_set import ROISet, scale_roi_data
+
+
+POLYGON = {'type': 'polygon', 'data': [[10, 20], [30, 40], [50, 60]]}
+TRAPEZOID = {'type': 'trapezoid', 'data': [[1, 2, 3], [4, 5, 6]]}
+
+
+def _old_process_roi_data(roi_data, type, scale=1):
+    # Same formula as src.remap_roi.process_roi_data, which needs SimpleITK and phas to import
+    if type == 'polygon':
+        return [[(x + 0.5) * scale, (y + 0.5) * scale] for x, y in roi_data]
+    return [[(x + 0.5) * scale, (y + 0.5) * scale, w * scale] for x, y, w in roi_data]
+
+
+def test_round_trip_mixed_types():
+    roi_jsons = [POLYGON, TRAPEZOID, POLYGON]
+    rois = ROISet.from_json(roi_jsons)
+
+    assert len(rois) == 3
+    assert rois.rois['start'].tolist() == [0, 3, 5]
+    assert rois.rois['stop'].tolist() == [3, 5, 8]
+    for i, roi_json in enumerate(roi_jsons):
+        assert rois.to_json(i) == roi_json
+
+
+def test_scaled_matches_old_formula():
+    roi_jsons = [POLYGON, TRAPEZOID]
+    scale = 0.037
+    rois = ROISet.from_json(roi_jsons)
+    rois_scaled = rois.scaled(scale)
+
+    for i, roi_json in enumerate(roi_jsons):
+        expected = _old_process_roi_data(roi_json['data'], roi_json['type'], scale)
+        np.testing.assert_allclose(rois_scaled.to_data(i), expected)
+        np.testing.assert_allclose(rois.to_data(i, scale=scale), expected)
+
+    # Scaling returns a new container and leaves the original untouched
+    assert rois.to_json(0) == POLYGON
+
+
+def test_scale_roi_data_matches_old_formula():
+    scale = 40.0
+    for roi_json in [POLYGON, TRAPEZOID]:
+        expected = _old_process_roi_data(roi_json['data'], roi_json['type'], scale)
+        assert scale_roi_data(roi_json['type'], roi_json['data'], scale) == expected
+
+    # spatial_transform_roi returns polygon vertices as tuples
+    assert scale_roi_data('polygon', [(1, 2), (3, 4)], 2) == [[3, 5], [7, 9]]
+
+    with pytest.raises(ValueError):
+        scale_roi_data('circle', [[1, 2]], 2)
+
+
+def test_empty_input():
+    rois = ROISet.from_json([])
+
+    assert len(rois) == 0
+    assert len(rois.scaled(0.1).vertices) == 0
+
+
+@pytest.mark.parametrize("roi_json", [
+    {'type': 'circle', 'data': [[1, 2]]},
+    {'type': 'polygon', 'data': [[1, 2, 3]]},
+    {'type': 'trapezoid', 'data': [[1, 2]]},
+    {'type': 'polygon', 'data': [[1, 2], [3]]},
+    {'type': 'polygon', 'data': []},
+])
+def test_invalid_roi_rejected(roi_json):
+    with pytest.raises(ValueError):
+        ROISet.from_json([roi_json])